@@ -11,11 +11,15 @@ This module demonstrates:
 - Fragments
 """
 
+import math
+
 import graphene
 from graphene_django import DjangoObjectType
 from graphene import InputObjectType, String, Int, Float, Boolean, List
 from django_filters import FilterSet, CharFilter, NumberFilter, BooleanFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, Prefetch, Q
+from graphql.language import FieldNode
 from filtering_app.models import Category, Product, Review
 from decimal import Decimal
 
@@ -33,7 +37,7 @@ class ProductFilterSet(FilterSet):
     # Numeric range filters
     price_min = NumberFilter(field_name='price', lookup_expr='gte', label='Min price')
     price_max = NumberFilter(field_name='price', lookup_expr='lte', label='Max price')
-    rating_min = NumberFilter(field_name='rating', lookup_expr='gte', label='Min rating')
+    rating_min = NumberFilter(field_name='rating_x10', method='filter_rating_min', label='Min rating')
     
     # Boolean filters
     is_active = BooleanFilter(field_name='is_active', label='Is active')
@@ -49,10 +53,10 @@ class ProductFilterSet(FilterSet):
         fields=(
             ('name', 'name'),
             ('price', 'price'),
-            ('rating', 'rating'),
+            ('rating_x10', 'rating'),
             ('created_at', 'created_at'),
             ('-price', 'price_desc'),
-            ('-rating', 'rating_desc'),
+            ('-rating_x10', 'rating_desc'),
             ('-created_at', 'newest'),
         )
     )
@@ -66,6 +70,106 @@ class ProductFilterSet(FilterSet):
         if value:
             return queryset.filter(stock_quantity__gt=0)
         return queryset.filter(stock_quantity=0)
+    
+    def filter_rating_min(self, queryset, name, value):
+        """Filter on the stored tenths, e.g. 4.5 -> rating_x10 >= 45."""
+        return queryset.filter(rating_x10__gte=rating_min_tenths(value))
+
+
+def rating_min_tenths(value):
+    """Convert a minimum rating to tenths, rounding up so 4.05 excludes 4.0."""
+    return math.ceil(Decimal(str(value)) * 10)
+
+
+# =====================================================================
+# Ordered prefetches (models declare no default ordering)
+# =====================================================================
+
+# Rows inserted by one statement share a NOW() timestamp, so id breaks the
+# tie; otherwise offset pages could repeat or skip rows.
+NEWEST_FIRST = ('-created_at', '-id')
+
+
+def newest_products():
+    """Prefetch a category's products newest first."""
+    return Prefetch('products', queryset=Product.objects.order_by(*NEWEST_FIRST))
+
+
+# =====================================================================
+# Column projection
+# =====================================================================
+
+# ProductType field -> Product columns its resolver reads
+PRODUCT_FIELD_COLUMNS = {
+    'id': ['id'],
+    'name': ['name'],
+    'slug': ['slug'],
+    'description': ['description'],
+    'category': ['category'],
+    'price': ['price'],
+    'discountPercent': ['discount_percent'],
+    'discountedPrice': ['price', 'discount_percent'],
+    'stockQuantity': ['stock_quantity'],
+    'sku': ['sku'],
+    'isFeatured': ['is_featured'],
+    'isActive': ['is_active'],
+    'rating': ['rating_x10'],
+    'reviewCount': ['review_count'],
+    'createdAt': ['created_at'],
+    'updatedAt': ['updated_at'],
+    'publishedDate': ['published_date'],
+    'reviews': [],
+}
+
+
+def project_products(queryset, info):
+    """Load only the columns and relations the selection set asks for.
+    
+    Falls back to the full queryset when the selection uses fragments or
+    fields this map doesn't know, so projection can never drop data. A field
+    repeated under one response key arrives as several field nodes, and the
+    selections of all of them are merged.
+    """
+    fields = set()
+    for field_node in info.field_nodes:
+        for selection in field_node.selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                return queryset
+            fields.add(selection.name.value)
+    fields.discard('__typename')
+    if not fields <= PRODUCT_FIELD_COLUMNS.keys():
+        return queryset
+    
+    columns = {'id'}
+    for field in fields:
+        columns.update(PRODUCT_FIELD_COLUMNS[field])
+    if 'category' not in fields:
+        queryset = queryset.select_related(None)
+    if 'reviews' not in fields:
+        queryset = queryset.prefetch_related(None)
+    return queryset.only(*columns)
+
+
+# =====================================================================
+# Aggregations
+# =====================================================================
+
+def price_range_counts(info):
+    """Count all three price buckets in one query, once per request.
+    
+    The three priceRange* fields are usually asked for together; the counts
+    are kept on info.context so the second and third resolver reuse them.
+    """
+    counts = getattr(info.context, '_price_range_counts', None)
+    if counts is None:
+        counts = Product.objects.aggregate(
+            budget=Count('pk', filter=Q(price__lt=50)),
+            mid=Count('pk', filter=Q(price__gte=50, price__lt=200)),
+            premium=Count('pk', filter=Q(price__gte=200)),
+        )
+        if info.context is not None:
+            info.context._price_range_counts = counts
+    return counts
 
 
 # =====================================================================
@@ -95,6 +199,7 @@ class ReviewType(DjangoObjectType):
 class ProductType(DjangoObjectType):
     """GraphQL type for Product with custom fields."""
     discounted_price = graphene.Float()
+    rating = graphene.Decimal()
     
     class Meta:
         model = Product
@@ -105,6 +210,10 @@ class ProductType(DjangoObjectType):
     def resolve_discounted_price(self, info):
         """Calculate discounted price."""
         return float(self.discounted_price)
+    
+    def resolve_rating(self, info):
+        """Expose the stored tenths as a decimal rating."""
+        return self.rating
 
 
 # =====================================================================
@@ -230,26 +339,26 @@ class Query(graphene.ObjectType):
     
     # Resolvers
     def resolve_all_categories(self, info):
-        return Category.objects.prefetch_related('products').all()
+        return Category.objects.prefetch_related(newest_products()).order_by('name')
     
     def resolve_category(self, info, id):
         try:
-            return Category.objects.get(pk=id)
+            return Category.objects.prefetch_related(newest_products()).get(pk=id)
         except Category.DoesNotExist:
             return None
     
     def resolve_all_products(self, info):
-        return Product.objects.select_related('category').prefetch_related('reviews').all()
+        return project_products(Product.objects.with_relations(), info).order_by(*NEWEST_FIRST)
     
     def resolve_product(self, info, id):
         try:
-            return Product.objects.select_related('category').prefetch_related('reviews').get(pk=id)
+            return Product.objects.with_relations().get(pk=id)
         except Product.DoesNotExist:
             return None
     
     def resolve_products_filtered(self, info, filters=None, sort=None, page=1, page_size=10):
         """Advanced filtering and pagination resolver."""
-        queryset = Product.objects.select_related('category').prefetch_related('reviews').all()
+        queryset = Product.objects.with_relations()
         
         # Apply filters
         if filters:
@@ -266,7 +375,7 @@ class Query(graphene.ObjectType):
             if filters.price_max is not None:
                 queryset = queryset.filter(price__lte=filters.price_max)
             if filters.rating_min is not None:
-                queryset = queryset.filter(rating__gte=filters.rating_min)
+                queryset = queryset.filter(rating_x10__gte=rating_min_tenths(filters.rating_min))
             if filters.has_stock is not None:
                 if filters.has_stock:
                     queryset = queryset.filter(stock_quantity__gt=0)
@@ -278,14 +387,14 @@ class Query(graphene.ObjectType):
             field_map = {
                 'name': 'name',
                 'price': 'price',
-                'rating': 'rating',
+                'rating': 'rating_x10',
                 'created_at': 'created_at',
             }
             field = field_map.get(sort.field, 'created_at')
             order = '-' if sort.order == 'desc' else ''
-            queryset = queryset.order_by(f'{order}{field}')
+            queryset = queryset.order_by(f'{order}{field}', f'{order}id')
         else:
-            queryset = queryset.order_by('-created_at')
+            queryset = queryset.order_by(*NEWEST_FIRST)
         
         # Calculate pagination
         total_count = queryset.count()
@@ -306,7 +415,7 @@ class Query(graphene.ObjectType):
     
     def resolve_products_paginated(self, info, name=None, category_id=None, is_active=None, first=10, after=None):
         """Cursor-based pagination resolver."""
-        queryset = Product.objects.select_related('category').prefetch_related('reviews').all()
+        queryset = Product.objects.with_relations()
         
         # Apply filters
         if name:
@@ -316,7 +425,7 @@ class Query(graphene.ObjectType):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active)
         
-        queryset = queryset.order_by('-created_at')
+        queryset = queryset.order_by(*NEWEST_FIRST)
         
         # Simple cursor implementation (in production, use graphene-django relay)
         total_count = queryset.count()
@@ -344,18 +453,18 @@ class Query(graphene.ObjectType):
         )
     
     def resolve_all_reviews(self, info):
-        return Review.objects.select_related('product').all()
+        return Review.objects.select_related('product').order_by(*NEWEST_FIRST)
     
     def resolve_reviews_by_product(self, info, product_id, rating=None):
         """Get reviews for a specific product."""
         queryset = Review.objects.filter(product_id=product_id).select_related('product')
         if rating:
             queryset = queryset.filter(rating=rating)
-        return queryset
+        return queryset.order_by(*NEWEST_FIRST)
     
     def resolve_reviews_by_rating(self, info, rating):
         """Get all reviews with specific rating."""
-        return Review.objects.filter(rating=rating).select_related('product')
+        return Review.objects.filter(rating=rating).select_related('product').order_by(*NEWEST_FIRST)
     
     def resolve_avg_product_price(self, info):
         """Calculate average product price."""
@@ -365,15 +474,15 @@ class Query(graphene.ObjectType):
     
     def resolve_price_range_budget(self, info):
         """Count budget products (< $50)."""
-        return Product.objects.filter(price__lt=50).count()
+        return price_range_counts(info)['budget']
     
     def resolve_price_range_mid(self, info):
         """Count mid-range products ($50-$200)."""
-        return Product.objects.filter(price__gte=50, price__lt=200).count()
+        return price_range_counts(info)['mid']
     
     def resolve_price_range_premium(self, info):
         """Count premium products (>= $200)."""
-        return Product.objects.filter(price__gte=200).count()
+        return price_range_counts(info)['premium']
 
 
 schema = graphene.Schema(query=Query)
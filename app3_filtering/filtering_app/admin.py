@@ -10,6 +10,7 @@ from .models import Category, Product, Review
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
     search_fields = ['name']
+    ordering = ['name']
     prepopulated_fields = {'slug': ('name',)}
 
 
@@ -22,7 +23,7 @@ class ProductAdmin(admin.ModelAdmin):
         ('Basic Info', {'fields': ('name', 'slug', 'description', 'category')}),
         ('Pricing', {'fields': ('price', 'discount_percent')}),
         ('Inventory', {'fields': ('stock_quantity', 'sku')}),
-        ('Metadata', {'fields': ('is_featured', 'is_active', 'rating', 'review_count')}),
+        ('Metadata', {'fields': ('is_featured', 'is_active', 'rating_x10', 'rating_sum_x10', 'review_count')}),
         ('Dates', {'fields': ('published_date', 'created_at', 'updated_at')}),
     )
     prepopulated_fields = {'slug': ('name',)}
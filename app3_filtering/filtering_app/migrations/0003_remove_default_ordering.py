@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-15 22:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0002_review_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='product',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='review',
+            options={},
+        ),
+    ]
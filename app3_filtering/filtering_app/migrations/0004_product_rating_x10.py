@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:10
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+from django.db.models.functions import Cast, Round
+
+
+def copy_rating_to_tenths(apps, schema_editor):
+    Product = apps.get_model('filtering_app', 'Product')
+    Product.objects.update(
+        rating_x10=Cast(Round(F('rating') * 10), models.SmallIntegerField())
+    )
+
+
+def copy_tenths_to_rating(apps, schema_editor):
+    Product = apps.get_model('filtering_app', 'Product')
+    Product.objects.update(
+        rating=ExpressionWrapper(
+            Cast(F('rating_x10'), models.FloatField()) / 10,
+            output_field=models.DecimalField(max_digits=3, decimal_places=1),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0003_remove_default_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_x10',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_rating_to_tenths, copy_tenths_to_rating),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-rating_x10'], name='filtering_a_rating__58e677_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0004_product_rating_x10'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='rating',
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:25
+
+from django.db import migrations, models
+import django.db.models.functions.datetime
+
+
+# updated_at is maintained by the database. The trigger only fires when an
+# UPDATE leaves the column untouched, so an explicit value is still honoured.
+# Note that SQLite drops triggers when a migration rebuilds the table, so
+# later AlterField operations on Product must recreate this one.
+SQLITE_CREATE_TRIGGER = """
+CREATE TRIGGER filtering_app_product_updated_at
+AFTER UPDATE ON filtering_app_product
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE filtering_app_product
+    SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_DROP_TRIGGER = "DROP TRIGGER IF EXISTS filtering_app_product_updated_at"
+
+POSTGRES_CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION filtering_app_set_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+        NEW.updated_at := statement_timestamp();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER filtering_app_product_updated_at
+BEFORE UPDATE ON filtering_app_product
+FOR EACH ROW EXECUTE FUNCTION filtering_app_set_updated_at();
+"""
+
+POSTGRES_DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS filtering_app_product_updated_at ON filtering_app_product;
+DROP FUNCTION IF EXISTS filtering_app_set_updated_at();
+"""
+
+
+def create_updated_at_trigger(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE_TRIGGER)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE_TRIGGER)
+
+
+def drop_updated_at_trigger(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP_TRIGGER)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0005_remove_product_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='created_at',
+            field=models.DateTimeField(default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='created_at',
+            field=models.DateTimeField(default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='updated_at',
+            field=models.DateTimeField(default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='created_at',
+            field=models.DateTimeField(default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.RunPython(create_updated_at_trigger, drop_updated_at_trigger),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0006_db_timestamps'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={'verbose_name_plural': 'Categories'},
+        ),
+    ]
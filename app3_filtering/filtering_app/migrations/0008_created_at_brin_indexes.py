@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-15 23:55
+
+from django.db import migrations
+import filtering_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0007_remove_category_ordering'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='filtering_ap_created_456789_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='filtering_a_created_cbf534_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=filtering_app.models.TimeRangeIndex(fields=['created_at'], name='filtering_product_created_brin', pages_per_range=32),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=filtering_app.models.TimeRangeIndex(fields=['created_at'], name='filtering_review_created_brin', pages_per_range=32),
+        ),
+    ]
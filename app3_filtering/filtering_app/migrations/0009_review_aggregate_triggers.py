@@ -0,0 +1,114 @@
+# Generated by Django 4.2.7 on 2026-10-16 00:10
+
+from django.db import migrations
+
+
+# Product.review_count and Product.rating_x10 are kept in step with the
+# review table by the database: each review INSERT, DELETE or change of
+# rating/product folds into the product's running average in the same
+# statement, with no extra round trip from Python. The seeded counts act as
+# a baseline that new reviews are averaged into. As with 0006, SQLite drops
+# these triggers whenever a migration rebuilds filtering_app_review.
+SQLITE_ADD_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = review_count + 1,
+        rating_x10 = CAST(ROUND((rating_x10 * review_count + NEW.rating * 10) * 1.0
+                                / (review_count + 1)) AS INTEGER)
+    WHERE id = NEW.product_id;
+"""
+
+SQLITE_REMOVE_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = MAX(review_count - 1, 0),
+        rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                          ELSE CAST(ROUND((rating_x10 * review_count - OLD.rating * 10) * 1.0
+                                          / (review_count - 1)) AS INTEGER)
+                     END
+    WHERE id = OLD.product_id;
+"""
+
+SQLITE_CREATE_TRIGGERS = [
+    """
+CREATE TRIGGER filtering_app_review_insert_aggregates
+AFTER INSERT ON filtering_app_review
+FOR EACH ROW
+BEGIN""" + SQLITE_ADD_REVIEW + "END",
+    """
+CREATE TRIGGER filtering_app_review_delete_aggregates
+AFTER DELETE ON filtering_app_review
+FOR EACH ROW
+BEGIN""" + SQLITE_REMOVE_REVIEW + "END",
+    """
+CREATE TRIGGER filtering_app_review_update_aggregates
+AFTER UPDATE OF rating, product_id ON filtering_app_review
+FOR EACH ROW
+BEGIN""" + SQLITE_REMOVE_REVIEW + SQLITE_ADD_REVIEW + "END",
+]
+
+SQLITE_DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS filtering_app_review_insert_aggregates",
+    "DROP TRIGGER IF EXISTS filtering_app_review_delete_aggregates",
+    "DROP TRIGGER IF EXISTS filtering_app_review_update_aggregates",
+]
+
+POSTGRES_CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION filtering_app_update_product_rating() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE filtering_app_product
+        SET review_count = GREATEST(review_count - 1, 0),
+            rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                              ELSE ROUND((rating_x10 * review_count - OLD.rating * 10)::numeric
+                                         / (review_count - 1))
+                         END
+        WHERE id = OLD.product_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE filtering_app_product
+        SET review_count = review_count + 1,
+            rating_x10 = ROUND((rating_x10 * review_count + NEW.rating * 10)::numeric
+                               / (review_count + 1))
+        WHERE id = NEW.product_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER filtering_app_review_aggregates
+AFTER INSERT OR DELETE OR UPDATE OF rating, product_id ON filtering_app_review
+FOR EACH ROW EXECUTE FUNCTION filtering_app_update_product_rating();
+"""
+
+POSTGRES_DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS filtering_app_review_aggregates ON filtering_app_review;
+DROP FUNCTION IF EXISTS filtering_app_update_product_rating();
+"""
+
+
+def create_review_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_CREATE_TRIGGERS:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE_TRIGGER)
+
+
+def drop_review_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sql in SQLITE_DROP_TRIGGERS:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0008_created_at_brin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_review_triggers, drop_review_triggers),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-16 00:25
+
+from django.db import migrations
+
+
+# Slugs and SKUs are ASCII identifiers matched and sorted byte for byte, so
+# on PostgreSQL they use the "C" collation: index lookups and ORDER BY become
+# plain memcmp instead of locale-aware comparisons. SQLite's default BINARY
+# collation already compares bytes, and declaring db_collation on the fields
+# would make SQLite rebuild both tables (dropping the triggers from 0006 and
+# 0009) to get the same result, so this is applied on PostgreSQL only.
+POSTGRES_SET_COLLATION = """
+ALTER TABLE filtering_app_category
+    ALTER COLUMN slug TYPE varchar(50) COLLATE "C";
+ALTER TABLE filtering_app_product
+    ALTER COLUMN slug TYPE varchar(50) COLLATE "C",
+    ALTER COLUMN sku TYPE varchar(50) COLLATE "C";
+"""
+
+POSTGRES_RESET_COLLATION = """
+ALTER TABLE filtering_app_category
+    ALTER COLUMN slug TYPE varchar(50) COLLATE "default";
+ALTER TABLE filtering_app_product
+    ALTER COLUMN slug TYPE varchar(50) COLLATE "default",
+    ALTER COLUMN sku TYPE varchar(50) COLLATE "default";
+"""
+
+
+def set_identifier_collation(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_SET_COLLATION)
+
+
+def reset_identifier_collation(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_RESET_COLLATION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0009_review_aggregate_triggers'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_identifier_collation, reset_identifier_collation),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-16 00:40
+
+from django.db import migrations
+
+
+# On PostgreSQL every INSERT draws its id from the table's sequence, which by
+# default hands out one value per call. Caching a block per session lets a
+# bulk load draw ids from memory; the cost is gaps in the ids when a session
+# ends with unused values. SQLite assigns rowids itself, so there is nothing
+# to tune there.
+SEQUENCE_CACHE = {
+    'filtering_app_category': 100,
+    'filtering_app_product': 1000,
+    'filtering_app_review': 1000,
+}
+
+
+def set_sequence_cache(apps, schema_editor, default=False):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, cache in SEQUENCE_CACHE.items():
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+            sequence = cursor.fetchone()[0]
+            schema_editor.execute(f'ALTER SEQUENCE {sequence} CACHE {1 if default else cache}')
+
+
+def reset_sequence_cache(apps, schema_editor):
+    set_sequence_cache(apps, schema_editor, default=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0010_identifier_collation'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_sequence_cache, reset_sequence_cache),
+    ]
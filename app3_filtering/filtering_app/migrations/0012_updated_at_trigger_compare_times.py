@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-16 01:10
+
+from django.db import migrations
+
+
+# The SQLite trigger from 0006 compared updated_at as text, but Django writes
+# datetimes back with six fractional digits ('...:07.652000') while NOW()
+# stores three ('...:07.652'). The values never matched, so saving a product
+# loaded from the database left updated_at alone. Comparing julianday()
+# values compares the times themselves. PostgreSQL compares timestamps
+# already, so its trigger is unchanged.
+SQLITE_CREATE_TRIGGER = """
+CREATE TRIGGER filtering_app_product_updated_at
+AFTER UPDATE ON filtering_app_product
+FOR EACH ROW WHEN julianday(NEW.updated_at) = julianday(OLD.updated_at)
+BEGIN
+    UPDATE filtering_app_product
+    SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_CREATE_OLD_TRIGGER = """
+CREATE TRIGGER filtering_app_product_updated_at
+AFTER UPDATE ON filtering_app_product
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE filtering_app_product
+    SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_DROP_TRIGGER = "DROP TRIGGER IF EXISTS filtering_app_product_updated_at"
+
+
+def compare_times(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP_TRIGGER)
+        schema_editor.execute(SQLITE_CREATE_TRIGGER)
+
+
+def compare_text(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP_TRIGGER)
+        schema_editor.execute(SQLITE_CREATE_OLD_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0011_id_sequence_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(compare_times, compare_text),
+    ]
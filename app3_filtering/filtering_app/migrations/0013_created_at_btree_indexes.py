@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+# 0008 swapped the created_at B-trees for BRIN indexes, but BRIN can't return
+# rows in order, so newest-first listings with a LIMIT sorted the whole table.
+# The B-trees come back here next to the BRIN indexes. On SQLite the BRIN
+# indexes used to fall back to plain indexes under the *_brin names; those
+# duplicate the B-trees, so they are dropped.
+FALLBACK_INDEXES = {
+    'filtering_product_created_brin': ('filtering_app_product', 'created_at'),
+    'filtering_review_created_brin': ('filtering_app_review', 'created_at'),
+}
+
+
+def drop_fallback_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    for name in FALLBACK_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def restore_fallback_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    for name, (table, column) in FALLBACK_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0012_updated_at_trigger_compare_times'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fallback_indexes, restore_fallback_indexes),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at'], name='filtering_product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at'], name='filtering_review_created_idx'),
+        ),
+    ]
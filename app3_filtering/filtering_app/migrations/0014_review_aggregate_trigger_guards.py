@@ -0,0 +1,92 @@
+from django.db import migrations
+
+
+# UPDATE OF rating, product_id fires whenever those columns appear in the
+# SET list, and Review.save() writes every column, so editing a review's
+# text took it out of the product's average and put it back - an extra
+# product write per save, and a rounding drift in rating_x10 each time.
+# The update triggers now skip rows whose rating and product are unchanged.
+SQLITE_ADD_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = review_count + 1,
+        rating_x10 = CAST(ROUND((rating_x10 * review_count + NEW.rating * 10) * 1.0
+                                / (review_count + 1)) AS INTEGER)
+    WHERE id = NEW.product_id;
+"""
+
+SQLITE_REMOVE_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = MAX(review_count - 1, 0),
+        rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                          ELSE CAST(ROUND((rating_x10 * review_count - OLD.rating * 10) * 1.0
+                                          / (review_count - 1)) AS INTEGER)
+                     END
+    WHERE id = OLD.product_id;
+"""
+
+SQLITE_UPDATE_TRIGGER = """
+CREATE TRIGGER filtering_app_review_update_aggregates
+AFTER UPDATE OF rating, product_id ON filtering_app_review
+FOR EACH ROW{when}
+BEGIN""" + SQLITE_REMOVE_REVIEW + SQLITE_ADD_REVIEW + "END"
+
+SQLITE_GUARD = " WHEN OLD.rating IS NOT NEW.rating OR OLD.product_id IS NOT NEW.product_id"
+
+SQLITE_DROP_UPDATE_TRIGGER = "DROP TRIGGER IF EXISTS filtering_app_review_update_aggregates"
+
+POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION filtering_app_update_product_rating() RETURNS trigger AS $$
+BEGIN{guard}
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE filtering_app_product
+        SET review_count = GREATEST(review_count - 1, 0),
+            rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                              ELSE ROUND((rating_x10 * review_count - OLD.rating * 10)::numeric
+                                         / (review_count - 1))
+                         END
+        WHERE id = OLD.product_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE filtering_app_product
+        SET review_count = review_count + 1,
+            rating_x10 = ROUND((rating_x10 * review_count + NEW.rating * 10)::numeric
+                               / (review_count + 1))
+        WHERE id = NEW.product_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# A trigger covering INSERT and DELETE as well can't mention OLD and NEW in
+# its WHEN clause, so on PostgreSQL the check lives in the function.
+POSTGRES_GUARD = """
+    IF TG_OP = 'UPDATE'
+       AND NEW.rating IS NOT DISTINCT FROM OLD.rating
+       AND NEW.product_id IS NOT DISTINCT FROM OLD.product_id THEN
+        RETURN NULL;
+    END IF;"""
+
+
+def set_update_guard(apps, schema_editor, guarded=True):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP_UPDATE_TRIGGER)
+        schema_editor.execute(SQLITE_UPDATE_TRIGGER.format(when=SQLITE_GUARD if guarded else ''))
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_FUNCTION.format(guard=POSTGRES_GUARD if guarded else ''))
+
+
+def remove_update_guard(apps, schema_editor):
+    set_update_guard(apps, schema_editor, guarded=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0013_created_at_btree_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_update_guard, remove_update_guard),
+    ]
@@ -0,0 +1,211 @@
+from django.db import migrations, models
+
+
+# Folding each review into the stored average, rounded to tenths, lost up
+# to half a tenth per review and never got it back: 200 reviews rating
+# 4, 5, 5, ... stored 4.6 against a true 4.665. The product now keeps the
+# sum of its ratings in tenths, and rating_x10 is that sum over
+# review_count, rounded half up once per write. Seeded aggregates become
+# rating_x10 * review_count.
+#
+# Adding the column makes SQLite rebuild filtering_app_product, which drops
+# its updated_at trigger (0006/0012), so it is recreated afterwards. Newer
+# SQLite drops the column in place on the way back and keeps the trigger.
+SQLITE_UPDATED_AT_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS filtering_app_product_updated_at
+AFTER UPDATE ON filtering_app_product
+FOR EACH ROW WHEN julianday(NEW.updated_at) = julianday(OLD.updated_at)
+BEGIN
+    UPDATE filtering_app_product
+    SET updated_at = STRFTIME('%Y-%m-%d %H:%M:%f', 'NOW')
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_ADD_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = review_count + 1,
+        rating_sum_x10 = rating_sum_x10 + NEW.rating * 10,
+        rating_x10 = CAST(ROUND((rating_sum_x10 + NEW.rating * 10) * 1.0
+                                / (review_count + 1)) AS INTEGER)
+    WHERE id = NEW.product_id;
+"""
+
+SQLITE_REMOVE_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = MAX(review_count - 1, 0),
+        rating_sum_x10 = CASE WHEN review_count <= 1 THEN 0
+                              ELSE rating_sum_x10 - OLD.rating * 10
+                         END,
+        rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                          ELSE CAST(ROUND((rating_sum_x10 - OLD.rating * 10) * 1.0
+                                          / (review_count - 1)) AS INTEGER)
+                     END
+    WHERE id = OLD.product_id;
+"""
+
+SQLITE_CREATE_TRIGGERS = [
+    """
+CREATE TRIGGER filtering_app_review_insert_aggregates
+AFTER INSERT ON filtering_app_review
+FOR EACH ROW
+BEGIN""" + SQLITE_ADD_REVIEW + "END",
+    """
+CREATE TRIGGER filtering_app_review_delete_aggregates
+AFTER DELETE ON filtering_app_review
+FOR EACH ROW
+BEGIN""" + SQLITE_REMOVE_REVIEW + "END",
+    """
+CREATE TRIGGER filtering_app_review_update_aggregates
+AFTER UPDATE OF rating, product_id ON filtering_app_review
+FOR EACH ROW WHEN OLD.rating IS NOT NEW.rating OR OLD.product_id IS NOT NEW.product_id
+BEGIN""" + SQLITE_REMOVE_REVIEW + SQLITE_ADD_REVIEW + "END",
+]
+
+SQLITE_DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS filtering_app_review_insert_aggregates",
+    "DROP TRIGGER IF EXISTS filtering_app_review_delete_aggregates",
+    "DROP TRIGGER IF EXISTS filtering_app_review_update_aggregates",
+]
+
+POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION filtering_app_update_product_rating() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.rating IS NOT DISTINCT FROM OLD.rating
+       AND NEW.product_id IS NOT DISTINCT FROM OLD.product_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE filtering_app_product
+        SET review_count = GREATEST(review_count - 1, 0),
+            rating_sum_x10 = CASE WHEN review_count <= 1 THEN 0
+                                  ELSE rating_sum_x10 - OLD.rating * 10
+                             END,
+            rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                              ELSE ROUND((rating_sum_x10 - OLD.rating * 10)::numeric
+                                         / (review_count - 1))
+                         END
+        WHERE id = OLD.product_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE filtering_app_product
+        SET review_count = review_count + 1,
+            rating_sum_x10 = rating_sum_x10 + NEW.rating * 10,
+            rating_x10 = ROUND((rating_sum_x10 + NEW.rating * 10)::numeric
+                               / (review_count + 1))
+        WHERE id = NEW.product_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# As left by 0014, for migrating back.
+SQLITE_OLD_ADD_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = review_count + 1,
+        rating_x10 = CAST(ROUND((rating_x10 * review_count + NEW.rating * 10) * 1.0
+                                / (review_count + 1)) AS INTEGER)
+    WHERE id = NEW.product_id;
+"""
+
+SQLITE_OLD_REMOVE_REVIEW = """
+    UPDATE filtering_app_product
+    SET review_count = MAX(review_count - 1, 0),
+        rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                          ELSE CAST(ROUND((rating_x10 * review_count - OLD.rating * 10) * 1.0
+                                          / (review_count - 1)) AS INTEGER)
+                     END
+    WHERE id = OLD.product_id;
+"""
+
+SQLITE_OLD_CREATE_TRIGGERS = [
+    sql.replace(SQLITE_ADD_REVIEW, SQLITE_OLD_ADD_REVIEW).replace(SQLITE_REMOVE_REVIEW, SQLITE_OLD_REMOVE_REVIEW)
+    for sql in SQLITE_CREATE_TRIGGERS
+]
+
+POSTGRES_OLD_FUNCTION = """
+CREATE OR REPLACE FUNCTION filtering_app_update_product_rating() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.rating IS NOT DISTINCT FROM OLD.rating
+       AND NEW.product_id IS NOT DISTINCT FROM OLD.product_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE filtering_app_product
+        SET review_count = GREATEST(review_count - 1, 0),
+            rating_x10 = CASE WHEN review_count <= 1 THEN 0
+                              ELSE ROUND((rating_x10 * review_count - OLD.rating * 10)::numeric
+                                         / (review_count - 1))
+                         END
+        WHERE id = OLD.product_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE filtering_app_product
+        SET review_count = review_count + 1,
+            rating_x10 = ROUND((rating_x10 * review_count + NEW.rating * 10)::numeric
+                               / (review_count + 1))
+        WHERE id = NEW.product_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def drop_review_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_DROP_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+def restore_average_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(SQLITE_UPDATED_AT_TRIGGER)
+        for sql in SQLITE_OLD_CREATE_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+def fill_sums_and_create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # The rebuilt table has no updated_at trigger yet, so the backfill
+        # leaves updated_at alone.
+        schema_editor.execute('UPDATE filtering_app_product SET rating_sum_x10 = rating_x10 * review_count')
+        schema_editor.execute(SQLITE_UPDATED_AT_TRIGGER)
+        for sql in SQLITE_CREATE_TRIGGERS:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE filtering_app_product DISABLE TRIGGER filtering_app_product_updated_at')
+        schema_editor.execute('UPDATE filtering_app_product SET rating_sum_x10 = rating_x10 * review_count')
+        schema_editor.execute('ALTER TABLE filtering_app_product ENABLE TRIGGER filtering_app_product_updated_at')
+        schema_editor.execute(POSTGRES_FUNCTION)
+
+
+def drop_sum_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        drop_review_triggers(apps, schema_editor)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_OLD_FUNCTION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filtering_app', '0014_review_aggregate_trigger_guards'),
+    ]
+
+    # SQLite won't rename the rebuilt product table while the review
+    # triggers name it, so they are dropped around the rebuild both ways.
+    operations = [
+        migrations.RunPython(drop_review_triggers, restore_average_triggers),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum_x10',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_sums_and_create_triggers, drop_sum_triggers),
+    ]
@@ -7,30 +7,107 @@ This module demonstrates:
 - Setup for pagination examples
 """
 
-from django.db import models
+from contextlib import contextmanager
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import connections, models, transaction
+from django.db.models.functions import Now
 from django.contrib.auth.models import User
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+
+HUNDRED = Decimal('100')
+
+
+class TimeRangeIndex(BrinIndex):
+    """BRIN index on PostgreSQL, nothing on other backends.
+    
+    Timestamps here are append-only, so rows arrive roughly in created_at
+    order and a BRIN index (min/max per block range) serves time-range
+    filters at a tiny fraction of a B-tree's size. It can't return rows in
+    order, though, so it sits next to the created_at B-tree that
+    newest-first listings use rather than replacing it. SQLite has no BRIN
+    and the B-tree already covers range filters there, so no index is made.
+    """
+    
+    def __init__(self, *, pages_per_range=32, **kwargs):
+        super().__init__(pages_per_range=pages_per_range, **kwargs)
+    
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+    
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+class DatabaseNowField(models.DateTimeField):
+    """DateTimeField the database fills in with NOW() on INSERT.
+    
+    An instance saved in this process still holds the Now() expression, not
+    the stored time, so a later save writes the column back unchanged rather
+    than sending NOW() again. The difference is Python-side only, so
+    migrations see a plain DateTimeField.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', Now())
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+    
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if not add and isinstance(value, Now):
+            return models.F(self.attname)
+        return value
+    
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.DateTimeField', args, kwargs
 
 
 class Category(models.Model):
     """Product category."""
     name = models.CharField(max_length=100, unique=True)
-    slug = models.SlugField(unique=True)
+    slug = models.SlugField(max_length=50, unique=True)  # byte-order collation, see migration 0010
     description = models.TextField(blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = DatabaseNowField()
     
     class Meta:
-        ordering = ['name']
+        # No default ordering, so slug/pk lookups skip the sort; listings
+        # order by name explicitly and use the unique index on it.
         verbose_name_plural = 'Categories'
     
     def __str__(self):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    """QuerySet helpers for Product."""
+    
+    def with_relations(self):
+        """Load the category and reviews that ProductType exposes.
+        
+        List resolvers should always start from this: the category comes in
+        through a JOIN and all reviews in one extra query, instead of one
+        query per product for each.
+        """
+        return self.select_related('category').prefetch_related(
+            models.Prefetch('reviews', queryset=Review.objects.order_by('-created_at', '-id'))
+        )
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for product in objs:
+            product.set_rating_baseline()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Product(models.Model):
     """E-commerce product model for filtering/pagination examples."""
     name = models.CharField(max_length=255)
-    slug = models.SlugField(unique=True)
+    slug = models.SlugField(max_length=50, unique=True)  # byte-order collation, see migration 0010
     description = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     
@@ -40,36 +117,73 @@ class Product(models.Model):
     
     # Inventory
     stock_quantity = models.IntegerField(default=0)
-    sku = models.CharField(max_length=50, unique=True)
+    sku = models.CharField(max_length=50, unique=True)  # byte-order collation, see migration 0010
     
     # Metadata
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
-    rating = models.DecimalField(max_digits=3, decimal_places=1, default=0)
+    # Review aggregates, kept current by triggers on the review table (see
+    # migrations 0009 and 0015) - don't recompute them in Python. rating_x10
+    # is rating_sum_x10 / review_count, rounded once, so it never drifts.
+    rating_x10 = models.SmallIntegerField(default=0)  # rating in tenths: 4.5 -> 45
+    rating_sum_x10 = models.IntegerField(default=0)  # sum of all ratings in tenths
     review_count = models.IntegerField(default=0)
     
-    # Dates
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Dates - filled in by the database, not Python: INSERTs send NOW() and
+    # updated_at is bumped by a trigger on every save (see migrations 0006
+    # and 0012). Call refresh_from_db() to read them back on an instance you
+    # just saved.
+    created_at = DatabaseNowField()
+    updated_at = DatabaseNowField()
     published_date = models.DateField(null=True, blank=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-created_at']
+        # No default ordering: an implicit ORDER BY on every queryset forces a
+        # sort even for lookups like filter(sku=...). Resolvers that list
+        # products order explicitly, newest first with ('-created_at', '-id').
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['is_active']),
             models.Index(fields=['price']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at'], name='filtering_product_created_idx'),
+            TimeRangeIndex(fields=['created_at'], name='filtering_product_created_brin'),
+            models.Index(fields=['-rating_x10']),
         ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_rating_baseline()
+        super().save(*args, **kwargs)
+    
+    def set_rating_baseline(self):
+        """Count a new product's rating and review_count as reviews already averaged in.
+        
+        They stand for reviews that aren't in the review table; later reviews
+        are added to the sum they give. Called by save() and bulk_create().
+        """
+        if not self.rating_sum_x10:
+            self.rating_sum_x10 = self.rating_x10 * self.review_count
+    
+    @property
+    def rating(self):
+        """Average rating on the 0-5 scale, e.g. Decimal('4.5')."""
+        return Decimal(self.rating_x10) / 10
+    
+    @rating.setter
+    def rating(self, value):
+        # Half up, like the review triggers: 4.45 -> 45
+        self.rating_x10 = int((Decimal(str(value)) * 10).quantize(Decimal(1), ROUND_HALF_UP))
+    
     @property
     def discounted_price(self):
         """Calculate discounted price."""
         if self.discount_percent:
-            return self.price * (Decimal('1') - Decimal(str(self.discount_percent)) / Decimal('100'))
+            return self.price * (HUNDRED - self.discount_percent) / HUNDRED
         return self.price
 
 
@@ -84,10 +198,76 @@ class Review(models.Model):
     comment = models.TextField()
     is_verified_purchase = models.BooleanField(default=False)
     helpful_count = models.IntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = DatabaseNowField()
     
     class Meta:
-        ordering = ['-created_at']
+        # Reviews are read newest-first, mostly per product: the B-trees
+        # return them in order so LIMIT stops early, and the BRIN index
+        # serves time-range filters on PostgreSQL.
+        indexes = [
+            models.Index(fields=['-created_at'], name='filtering_review_created_idx'),
+            TimeRangeIndex(fields=['created_at'], name='filtering_review_created_brin'),
+            models.Index(fields=['product', '-created_at']),
+        ]
     
     def __str__(self):
         return f"Review of {self.product.name} by {self.user}"
+
+
+def review_totals(using):
+    """Return {product_id: (review rows, sum of ratings)} for every product."""
+    rows = (Review.objects.using(using).order_by().values_list('product_id')
+            .annotate(models.Count('id'), models.Sum('rating')))
+    return {product_id: (count, total) for product_id, count, total in rows}
+
+
+@contextmanager
+def deferred_review_aggregates(using='default'):
+    """Turn the review aggregate triggers off for a bulk load, then catch up.
+    
+    The triggers update the product row once per review written. Inside this
+    block they are off; on exit the change in each product's review rows and
+    rating sum is added to review_count and rating_sum_x10, and rating_x10
+    derived from them, with one UPDATE per changed product - the same
+    values the triggers would have left. The block runs in a transaction,
+    so other sessions never write reviews while the triggers are off.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        before = review_totals(using)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ALTER TABLE filtering_app_review '
+                               'DISABLE TRIGGER filtering_app_review_aggregates')
+            else:
+                # SQLite can't disable a trigger, so drop it and replay its DDL.
+                cursor.execute("SELECT name, sql FROM sqlite_master "
+                               "WHERE type = 'trigger' AND name LIKE 'filtering_app_review_%_aggregates'")
+                triggers = cursor.fetchall()
+                for name, _ in triggers:
+                    cursor.execute(f'DROP TRIGGER {name}')
+        yield
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('ALTER TABLE filtering_app_review '
+                               'ENABLE TRIGGER filtering_app_review_aggregates')
+            else:
+                for _, sql in triggers:
+                    cursor.execute(sql)
+        after = review_totals(using)
+        changes = {}
+        for product_id in before.keys() | after.keys():
+            count, total = after.get(product_id, (0, 0))
+            old_count, old_total = before.get(product_id, (0, 0))
+            if (count, total) != (old_count, old_total):
+                changes[product_id] = (count - old_count, total - old_total)
+        products = Product.objects.using(using).only('review_count', 'rating_sum_x10').in_bulk(changes)
+        for product_id, product in products.items():
+            added, added_total = changes[product_id]
+            review_count = max(product.review_count + added, 0)
+            rating_sum_x10 = product.rating_sum_x10 + added_total * 10 if review_count else 0
+            rating_x10 = (int((Decimal(rating_sum_x10) / review_count).quantize(Decimal(1), ROUND_HALF_UP))
+                          if review_count else 0)
+            Product.objects.using(using).filter(pk=product_id).update(
+                review_count=review_count, rating_sum_x10=rating_sum_x10, rating_x10=rating_x10
+            )
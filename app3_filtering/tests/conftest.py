@@ -3,17 +3,129 @@ Pytest configuration and fixtures for App 3: Filtering, Sorting, Pagination
 """
 import pytest
 import os
+import hashlib
+import runpy
+import shutil
+import sqlite3
+from pathlib import Path
 import django
+from django.db.backends.signals import connection_created
 
 # Setup Django settings before importing models
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+
+APP_DIR = Path(__file__).resolve().parent.parent
+MIGRATIONS_DIR = APP_DIR / 'filtering_app' / 'migrations'
+MODELS_FILE = APP_DIR / 'filtering_app' / 'models.py'
+SEED_SCRIPT = APP_DIR / 'add_sample_data.py'
+
+# Tests run against an in-memory copy of the template by default; set
+# TEST_DB_IN_MEMORY=0 to get an on-disk copy you can open after a failure.
+TEST_DB_IN_MEMORY = os.environ.get('TEST_DB_IN_MEMORY', '1') != '0'
+
+
+def relax_sqlite_durability(sender, connection, **kwargs):
+    """Skip fsync and the on-disk rollback journal for test connections.
+
+    Test rows never outlive the test that wrote them, so durability is pure
+    overhead here - the SQLite counterpart of UNLOGGED tables on Postgres.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+            cursor.execute('PRAGMA journal_mode = MEMORY')
+
+
+connection_created.connect(relax_sqlite_durability)
+
+
+def template_fingerprint():
+    """Hash the migrations, models and seed script the template database is built from.
+    
+    The seed runs through the model code (the rating setter, bulk_create,
+    deferred_review_aggregates), so a model change rebuilds it too.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(MIGRATIONS_DIR.glob('*.py')) + [MODELS_FILE, SEED_SCRIPT]:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def use_database(path):
+    """Point the default connection at another SQLite file."""
+    connections['default'].close()
+    settings.DATABASES['default']['NAME'] = str(path)
+
+
+def restore_into_memory(template):
+    """Copy the template into an in-memory database on the default connection."""
+    use_database(':memory:')
+    connection = connections['default']
+    connection.ensure_connection()
+    source = sqlite3.connect(template)
+    try:
+        source.backup(connection.connection)
+    finally:
+        source.close()
+
+
+def build_template(template_dir, rebuild=False):
+    """Migrate and seed a template database, unless one for this schema exists.
+    
+    The database is built under a per-process name and renamed into place, so
+    pytest-xdist workers (pytest -n auto --dist=loadscope) never open a
+    half-built template; if two workers race, the last complete build wins.
+    """
+    fingerprint = template_fingerprint()
+    template = template_dir / f'template-{fingerprint}.sqlite3'
+    if template.exists() and not rebuild:
+        return template
+    for stale in template_dir.glob('template-*.sqlite3'):
+        stale.unlink(missing_ok=True)
+    building = template_dir / f'building-{fingerprint}-{os.getpid()}.sqlite3'
+    use_database(building)
+    try:
+        call_command('migrate', verbosity=0)
+        runpy.run_path(str(SEED_SCRIPT))
+    except BaseException:
+        connections['default'].close()
+        building.unlink(missing_ok=True)
+        raise
+    connections['default'].close()
+    os.replace(building, template)
+    return template
+
 
 @pytest.fixture(scope='session')
-def django_db_setup():
-    """Ensure database is setup for tests"""
-    pass
+def django_db_setup(request, django_db_blocker, tmp_path_factory):
+    """Give the session its own copy of a migrated, seeded template database.
+    
+    Migrating and seeding happens once per set of migrations and models; the
+    template is kept in the pytest cache, and later sessions only pay for
+    copying it into memory, where commits never touch the disk. pytest.ini
+    passes --reuse-db; run with --create-db to force a rebuild.
+    """
+    cache = getattr(request.config, 'cache', None)
+    if cache is not None:
+        template_dir = cache.mkdir('filtering_db_template')
+    else:
+        # Without the cache plugin (-p no:cacheprovider) the template only
+        # lasts for this session
+        template_dir = tmp_path_factory.mktemp('filtering_db_template')
+    rebuild = request.config.getvalue('create_db') or not request.config.getvalue('reuse_db')
+    with django_db_blocker.unblock():
+        template = build_template(template_dir, rebuild=rebuild)
+        if TEST_DB_IN_MEMORY:
+            restore_into_memory(template)
+            return
+    test_db = tmp_path_factory.mktemp('db') / 'test.sqlite3'
+    shutil.copyfile(template, test_db)
+    use_database(test_db)
 
 
 @pytest.fixture(scope='function')
@@ -3,6 +3,10 @@ Script to populate App 4 with sample data including users, posts, and comments.
 
 Run this after migrations:
 python manage.py shell < add_sample_data.py
+
+Rows are inserted with bulk_create in batches of SEED_BATCH_SIZE (default
+500), which keeps each INSERT under SQLite's bound-parameter limit as the
+data set grows. Override it with e.g. SEED_BATCH_SIZE=1000 on PostgreSQL.
 """
 
 import os
@@ -12,227 +16,186 @@ from datetime import datetime, timedelta
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+SEED_BATCH_SIZE = int(os.environ.get('SEED_BATCH_SIZE', '500'))
+
 from django.contrib.auth.models import User
-from auth_app.models import UserProfile, Post, Comment, ActivityLog
-
-# Clear existing data
-Comment.objects.all().delete()
-Post.objects.all().delete()
-User.objects.all().delete()
-
-print("Creating users...")
-
-# Create admin user
-admin_user = User.objects.create_user(
-    username='admin',
-    email='admin@example.com',
-    password='admin123',
-    first_name='Admin',
-    last_name='User'
-)
-admin_profile = admin_user.profile
-admin_profile.role = 'admin'
-admin_profile.bio = 'I am the administrator'
-admin_profile.is_email_verified = True
-admin_profile.save()
-
-# Create moderator user
-moderator_user = User.objects.create_user(
-    username='moderator',
-    email='moderator@example.com',
-    password='mod123',
-    first_name='Mod',
-    last_name='User'
-)
-moderator_profile = moderator_user.profile
-moderator_profile.role = 'moderator'
-moderator_profile.bio = 'I moderate the community'
-moderator_profile.is_email_verified = True
-moderator_profile.save()
-
-# Create regular user
-regular_user = User.objects.create_user(
-    username='user',
-    email='user@example.com',
-    password='user123',
-    first_name='John',
-    last_name='Doe'
-)
-user_profile = regular_user.profile
-user_profile.role = 'user'
-user_profile.bio = 'Just a regular user'
-user_profile.is_email_verified = False
-user_profile.save()
-
-print("Creating posts...")
-
-# Create posts from admin
-post1 = Post.objects.create(
-    title='Welcome to Our GraphQL Community',
-    content='This is a welcome post for our new GraphQL community. Feel free to share your questions and experiences!',
-    author=admin_user,
-    status='published',
-    can_comment=True
-)
-
-# Create posts from moderator
-post2 = Post.objects.create(
-    title='GraphQL vs REST API - A Comparison',
-    content='Today we discuss the differences between GraphQL and traditional REST APIs. GraphQL provides a more flexible approach to data fetching...',
-    author=moderator_user,
-    status='published',
-    can_comment=True
-)
-
-# Create draft post
-post3 = Post.objects.create(
-    title='Advanced Authentication Patterns',
-    content='In this post, we will explore advanced authentication patterns including OAuth2 and JWT tokens...',
-    author=moderator_user,
-    status='draft',
-    can_comment=False
-)
-
-# Create posts from regular user
-post4 = Post.objects.create(
-    title='My First GraphQL Project',
-    content='I just built my first GraphQL API using Django and Graphene. It was really interesting to learn about resolvers and input types!',
-    author=regular_user,
-    status='published',
-    can_comment=True
-)
-
-post5 = Post.objects.create(
-    title='Best Practices for GraphQL Schema Design',
-    content='Here are some best practices I learned while designing GraphQL schemas: naming conventions, avoiding deep nesting, using proper types...',
-    author=regular_user,
-    status='published',
-    can_comment=True
-)
-
-print("Creating comments...")
-
-# Comments on admin's post
-comment1 = Comment.objects.create(
-    text='Thanks for creating this community! Looking forward to learning GraphQL.',
-    post=post1,
-    author=regular_user,
-    is_approved=True
-)
-
-comment2 = Comment.objects.create(
-    text='Great initiative. Hope we can all learn together.',
-    post=post1,
-    author=moderator_user,
-    is_approved=True
-)
-
-# Comments on moderator's post
-comment3 = Comment.objects.create(
-    text='Excellent comparison! GraphQL is definitely more flexible.',
-    post=post2,
-    author=regular_user,
-    is_approved=True
-)
-
-comment4 = Comment.objects.create(
-    text='This is spam and should be deleted',
-    post=post2,
-    author=admin_user,
-    is_approved=False
-)
-
-# Comments on user's posts
-comment5 = Comment.objects.create(
-    text='Congratulations on your first project!',
-    post=post4,
-    author=admin_user,
-    is_approved=True
-)
-
-comment6 = Comment.objects.create(
-    text='Can you share the source code?',
-    post=post4,
-    author=moderator_user,
-    is_approved=True
-)
-
-comment7 = Comment.objects.create(
-    text='Great best practices list!',
-    post=post5,
-    author=moderator_user,
-    is_approved=True
-)
-
-comment8 = Comment.objects.create(
-    text='What do you think about mutations?',
-    post=post5,
-    author=admin_user,
-    is_approved=True
-)
-
-print("Creating activity logs...")
-
-# Log user activities
-ActivityLog.objects.create(
-    user=admin_user,
-    action='login',
-    details='Admin login'
-)
-
-ActivityLog.objects.create(
-    user=admin_user,
-    action='create_post',
-    details='Created post: Welcome to Our GraphQL Community'
-)
-
-ActivityLog.objects.create(
-    user=moderator_user,
-    action='login',
-    details='Moderator login'
-)
-
-ActivityLog.objects.create(
-    user=moderator_user,
-    action='create_post',
-    details='Created post: GraphQL vs REST API - A Comparison'
-)
-
-ActivityLog.objects.create(
-    user=moderator_user,
-    action='create_post',
-    details='Created post: Advanced Authentication Patterns'
-)
-
-ActivityLog.objects.create(
-    user=regular_user,
-    action='login',
-    details='User login'
-)
-
-ActivityLog.objects.create(
-    user=regular_user,
-    action='create_post',
-    details='Created post: My First GraphQL Project'
-)
-
-ActivityLog.objects.create(
-    user=regular_user,
-    action='create_post',
-    details='Created post: Best Practices for GraphQL Schema Design'
-)
-
-ActivityLog.objects.create(
-    user=regular_user,
-    action='update_profile',
-    details='Updated profile information'
-)
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from auth_app.models import UserProfile, Post, Comment, ActivityLog, create_user_profile
+
+# Tables wiped before seeding, in dependency order
+RESET_TABLES = [
+    Comment._meta.db_table,
+    Post._meta.db_table,
+    ActivityLog._meta.db_table,
+    UserProfile._meta.db_table,
+    User.groups.through._meta.db_table,
+    User.user_permissions.through._meta.db_table,
+    User._meta.db_table,
+]
+
+# username, email, password, first name, last name, role, bio, email verified
+USER_SPECS = [
+    ('admin', 'admin@example.com', 'admin123', 'Admin', 'User', 'admin', 'I am the administrator', True),
+    ('moderator', 'moderator@example.com', 'mod123', 'Mod', 'User', 'moderator', 'I moderate the community', True),
+    ('user', 'user@example.com', 'user123', 'John', 'Doe', 'user', 'Just a regular user', False),
+]
+
+# author, title, content, status, can comment
+POST_SPECS = [
+    # Posts from admin
+    ('admin', 'Welcome to Our GraphQL Community',
+     'This is a welcome post for our new GraphQL community. Feel free to share your questions and experiences!',
+     'published', True),
+    # Posts from moderator
+    ('moderator', 'GraphQL vs REST API - A Comparison',
+     'Today we discuss the differences between GraphQL and traditional REST APIs. GraphQL provides a more flexible approach to data fetching...',
+     'published', True),
+    ('moderator', 'Advanced Authentication Patterns',
+     'In this post, we will explore advanced authentication patterns including OAuth2 and JWT tokens...',
+     'draft', False),
+    # Posts from regular user
+    ('user', 'My First GraphQL Project',
+     'I just built my first GraphQL API using Django and Graphene. It was really interesting to learn about resolvers and input types!',
+     'published', True),
+    ('user', 'Best Practices for GraphQL Schema Design',
+     'Here are some best practices I learned while designing GraphQL schemas: naming conventions, avoiding deep nesting, using proper types...',
+     'published', True),
+]
+
+# post (index into POST_SPECS), author, text, approved
+COMMENT_SPECS = [
+    # Comments on admin's post
+    (0, 'user', 'Thanks for creating this community! Looking forward to learning GraphQL.', True),
+    (0, 'moderator', 'Great initiative. Hope we can all learn together.', True),
+    # Comments on moderator's post
+    (1, 'user', 'Excellent comparison! GraphQL is definitely more flexible.', True),
+    (1, 'admin', 'This is spam and should be deleted', False),
+    # Comments on user's posts
+    (3, 'admin', 'Congratulations on your first project!', True),
+    (3, 'moderator', 'Can you share the source code?', True),
+    (4, 'moderator', 'Great best practices list!', True),
+    (4, 'admin', 'What do you think about mutations?', True),
+]
+
+# user, action, details
+ACTIVITY_SPECS = [
+    ('admin', 'login', 'Admin login'),
+    ('admin', 'create_post', 'Created post: Welcome to Our GraphQL Community'),
+    ('moderator', 'login', 'Moderator login'),
+    ('moderator', 'create_post', 'Created post: GraphQL vs REST API - A Comparison'),
+    ('moderator', 'create_post', 'Created post: Advanced Authentication Patterns'),
+    ('user', 'login', 'User login'),
+    ('user', 'create_post', 'Created post: My First GraphQL Project'),
+    ('user', 'create_post', 'Created post: Best Practices for GraphQL Schema Design'),
+    ('user', 'update_profile', 'Updated profile information'),
+]
+
+# Sample data doesn't need to survive a power cut: on SQLite, skip fsyncs and
+# keep the rollback journal in memory while seeding. These are per-connection
+# settings; the previous values are put back afterwards.
+SEED_SQLITE_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'temp_store': 'MEMORY',
+}
+
+saved_pragmas = {}
+if connection.vendor == 'sqlite':
+    with connection.cursor() as cursor:
+        for pragma, value in SEED_SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            saved_pragmas[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+# Delete and reseed in one transaction, so the whole run commits once
+with transaction.atomic():
+    # Clear existing data with plain SQL instead of the ORM's cascading
+    # delete, which loads every row and sends signals for each one.
+    # Children come before parents so no foreign key is left dangling.
+    with connection.cursor() as cursor:
+        tables = ', '.join(RESET_TABLES)
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+        else:
+            for table in RESET_TABLES:
+                cursor.execute(f'DELETE FROM {table}')
+            if connection.vendor == 'sqlite':
+                placeholders = ', '.join(['%s'] * len(RESET_TABLES))
+                cursor.execute(
+                    f'DELETE FROM sqlite_sequence WHERE name IN ({placeholders})',
+                    RESET_TABLES,
+                )
+
+    print("Creating users...")
+
+    users = []
+    for username, email, password, first_name, last_name, *_ in USER_SPECS:
+        user = User(username=username, email=email, first_name=first_name, last_name=last_name)
+        user.set_password(password)
+        users.append(user)
+
+    # Users and profiles go in with one INSERT each. The post_save receiver
+    # would otherwise create every profile empty, so it's disconnected while
+    # seeding and the profiles are built directly.
+    post_save.disconnect(create_user_profile, sender=User)
+    try:
+        users = User.objects.bulk_create(users, batch_size=SEED_BATCH_SIZE)
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, role=role, bio=bio, is_email_verified=verified)
+            for user, (*_, role, bio, verified) in zip(users, USER_SPECS)
+        ], batch_size=SEED_BATCH_SIZE)
+    finally:
+        post_save.connect(create_user_profile, sender=User)
+
+    users_by_name = {user.username: user for user in users}
+
+    print("Creating posts...")
+
+    posts = Post.objects.bulk_create([
+        Post(
+            title=title,
+            content=content,
+            author=users_by_name[author],
+            status=status,
+            can_comment=can_comment
+        )
+        for author, title, content, status, can_comment in POST_SPECS
+    ], batch_size=SEED_BATCH_SIZE)
+
+    print("Creating comments...")
+
+    comments = Comment.objects.bulk_create([
+        Comment(
+            text=text,
+            post=posts[post],
+            author=users_by_name[author],
+            is_approved=is_approved
+        )
+        for post, author, text, is_approved in COMMENT_SPECS
+    ], batch_size=SEED_BATCH_SIZE)
+
+    print("Creating activity logs...")
+
+    activities = ActivityLog.objects.bulk_create([
+        ActivityLog(
+            user=users_by_name[user],
+            action=action,
+            details=details
+        )
+        for user, action, details in ACTIVITY_SPECS
+    ], batch_size=SEED_BATCH_SIZE)
+
+
+with connection.cursor() as cursor:
+    for pragma, value in saved_pragmas.items():
+        cursor.execute(f'PRAGMA {pragma} = {value}')
 
 print("✅ Sample data created successfully!")
-print(f"Created {User.objects.count()} users (admin, moderator, user)")
-print(f"Created {Post.objects.count()} posts with various statuses")
-print(f"Created {Comment.objects.count()} comments (some pending)")
-print(f"Created {ActivityLog.objects.count()} activity logs")
+print(f"Created {len(users)} users (admin, moderator, user)")
+print(f"Created {len(posts)} posts with various statuses")
+print(f"Created {len(comments)} comments (some pending)")
+print(f"Created {len(activities)} activity logs")
 
 print("\nDefault login credentials:")
 print("  Admin:      username='admin', password='admin123'")
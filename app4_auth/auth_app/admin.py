@@ -1,31 +1,63 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from auth_app.models import UserProfile, Post, Comment, ActivityLog
 
 
+class ListColumnsChangeList(ChangeList):
+    """Changelist that selects only the model admin's list_only_fields"""
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.model_admin.list_only_fields:
+            queryset = queryset.only(*self.model_admin.list_only_fields)
+        return queryset
+
+
+class ListColumnsAdmin(admin.ModelAdmin):
+    """Leave large text columns out of changelist pages
+    
+    list_only_fields names the columns list_display renders, with paths such
+    as author__username for models joined by list_select_related. Change
+    forms still load every field.
+    """
+    list_only_fields = []
+    
+    def get_changelist(self, request, **kwargs):
+        return ListColumnsChangeList
+
+
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ListColumnsAdmin):
     list_display = ['user', 'role', 'is_email_verified', 'created_at']
+    list_select_related = ['user']
+    list_only_fields = ['user__username', 'role', 'is_email_verified', 'created_at']
     list_filter = ['role', 'is_email_verified', 'created_at']
     search_fields = ['user__username', 'user__email']
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ListColumnsAdmin):
     list_display = ['title', 'author', 'status', 'created_at']
+    list_select_related = ['author']
+    list_only_fields = ['title', 'author__username', 'status', 'created_at']
     list_filter = ['status', 'created_at', 'author']
     search_fields = ['title', 'content']
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ListColumnsAdmin):
     list_display = ['author', 'post', 'is_approved', 'created_at']
+    # Post.__str__ includes the post author's username
+    list_select_related = ['author', 'post__author']
+    list_only_fields = ['author__username', 'post__title', 'post__author__username', 'is_approved', 'created_at']
     list_filter = ['is_approved', 'created_at']
     search_fields = ['text', 'author__username']
 
 
 @admin.register(ActivityLog)
-class ActivityLogAdmin(admin.ModelAdmin):
+class ActivityLogAdmin(ListColumnsAdmin):
     list_display = ['user', 'action', 'created_at']
+    list_select_related = ['user']
+    list_only_fields = ['user__username', 'action', 'created_at']
     list_filter = ['action', 'created_at']
     search_fields = ['user__username']
     readonly_fields = ['created_at']
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-16 01:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# ActivityLog.user is DO_NOTHING in Django; the database removes a user's
+# activity rows itself, so deleting users never has Django collect and
+# delete the audit log. On PostgreSQL the foreign key gets ON DELETE
+# CASCADE. SQLite can't alter a foreign key in place, so a trigger on
+# auth_user does the same; like any SQLite trigger it's dropped if a
+# migration ever rebuilds auth_user.
+SQLITE_CREATE_TRIGGER = """
+CREATE TRIGGER auth_activitylog_user_delete_cascade
+AFTER DELETE ON auth_user
+FOR EACH ROW
+BEGIN
+    DELETE FROM auth_activitylog WHERE user_id = OLD.id;
+END
+"""
+
+SQLITE_DROP_TRIGGER = "DROP TRIGGER IF EXISTS auth_activitylog_user_delete_cascade"
+
+POSTGRES_ADD_FOREIGN_KEY = """
+ALTER TABLE auth_activitylog
+ADD CONSTRAINT auth_activitylog_user_id_fk_auth_user_id
+FOREIGN KEY (user_id) REFERENCES auth_user (id) {on_delete}
+DEFERRABLE INITIALLY DEFERRED
+"""
+
+
+def user_foreign_keys(schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, 'auth_activitylog')
+    return [
+        name for name, constraint in constraints.items()
+        if constraint['foreign_key'] and constraint['columns'] == ['user_id']
+    ]
+
+
+def replace_postgres_foreign_key(schema_editor, on_delete):
+    for name in user_foreign_keys(schema_editor):
+        schema_editor.execute(
+            'ALTER TABLE auth_activitylog DROP CONSTRAINT %s' % schema_editor.quote_name(name)
+        )
+    schema_editor.execute(POSTGRES_ADD_FOREIGN_KEY.format(on_delete=on_delete))
+
+
+def add_database_cascade(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE_TRIGGER)
+    elif vendor == 'postgresql':
+        replace_postgres_foreign_key(schema_editor, 'ON DELETE CASCADE')
+
+
+def remove_database_cascade(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_DROP_TRIGGER)
+    elif vendor == 'postgresql':
+        replace_postgres_foreign_key(schema_editor, '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth_app', '0002_composite_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='activities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(add_database_cascade, remove_database_cascade),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 
@@ -28,16 +29,51 @@ class UserProfile(models.Model):
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
-    """Auto-create UserProfile when User is created"""
+    """Auto-create UserProfile when User is created
+    
+    Saving a User doesn't save its profile; call profile.save() after editing it.
+    """
     if created:
         UserProfile.objects.create(user=instance)
 
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Auto-save UserProfile when User is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+def auth_user_cache_key(user_id):
+    """Cache key for the user require_auth resolves from a token"""
+    return f'auth_user:{user_id}'
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=UserProfile)
+def forget_cached_auth_user(sender, instance, **kwargs):
+    """Drop the user require_auth cached, so account changes apply on the next request
+    
+    QuerySet.update() and bulk writes send no signals; after those, call
+    cache.delete(auth_user_cache_key(id)) by hand. require_auth re-reads
+    is_active and the role on every request either way.
+    """
+    user_id = instance.pk if sender is User else instance.user_id
+    cache.delete(auth_user_cache_key(user_id))
+
+
+class PostQuerySet(models.QuerySet):
+    """QuerySet helpers for Post"""
+    
+    def with_relations(self):
+        """Load the author and approved comments that PostType exposes
+        
+        The author comes in through a JOIN, approved_count is counted in the
+        same query, and the approved comments, with their authors, arrive in
+        one extra query, instead of queries per post.
+        """
+        return self.select_related('author').annotate(
+            approved_count=models.Count('comments', filter=models.Q(comments__is_approved=True)),
+        ).prefetch_related(
+            models.Prefetch(
+                'comments',
+                queryset=Comment.objects.filter(is_approved=True).select_related('author'),
+                to_attr='approved_comments',
+            )
+        )
 
 
 class Post(models.Model):
@@ -56,9 +92,16 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PostQuerySet.as_manager()
+    
     class Meta:
         db_table = 'auth_post'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['author', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.author.username}"
@@ -76,6 +119,10 @@ class Comment(models.Model):
     class Meta:
         db_table = 'auth_comment'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'created_at']),
+            models.Index(fields=['is_approved', '-created_at']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
@@ -92,7 +139,8 @@ class ActivityLog(models.Model):
         ('change_password', 'Change Password'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    # Deleted along with their user by the database, see migration 0003
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='activities')
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     details = models.TextField(blank=True, default='')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
@@ -101,6 +149,10 @@ class ActivityLog(models.Model):
     class Meta:
         db_table = 'auth_activitylog'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['action', '-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.action}"
@@ -1,40 +1,93 @@
 import graphene
+import json
 import jwt
-from datetime import datetime, timedelta
+import time
+from jwt.utils import base64url_encode
+from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from graphene_django import DjangoObjectType
-from auth_app.models import UserProfile, Post, Comment, ActivityLog
+from auth_app.models import UserProfile, Post, Comment, ActivityLog, auth_user_cache_key
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from graphql.language import FieldNode
 from functools import wraps
 
+try:
+    from orjson import dumps as json_bytes
+except ImportError:  # pragma: no cover - orjson is optional
+    def json_bytes(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
 
 # ==================== JWT Token Management ====================
 
+# jwt.encode looks up the algorithm, re-checks the key and serializes the same
+# header on every call; do all three once and sign tokens directly
+JWT_SIGNER = jwt.get_algorithm_by_name(settings.JWT_ALGORITHM)
+JWT_KEY = JWT_SIGNER.prepare_key(settings.JWT_SECRET)
+JWT_HEADER_SEGMENT = base64url_encode(
+    json_bytes({'alg': settings.JWT_ALGORITHM, 'typ': 'JWT'})
+)
+JWT_EXPIRATION_SECONDS = settings.JWT_EXPIRATION_HOURS * 3600
+
+
 def generate_token(user_id):
     """Generate JWT token for user"""
+    now = int(time.time())
     payload = {
         'user_id': user_id,
-        'exp': datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS),
-        'iat': datetime.utcnow()
+        'exp': now + JWT_EXPIRATION_SECONDS,
+        'iat': now
     }
-    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-    return token
+    # orjson writes the same compact JSON as json.dumps, straight to bytes
+    payload_segment = base64url_encode(json_bytes(payload))
+    signing_input = JWT_HEADER_SEGMENT + b'.' + payload_segment
+    signature = JWT_SIGNER.sign(signing_input, JWT_KEY)
+    return (signing_input + b'.' + base64url_encode(signature)).decode()
+
+
+# Payloads of tokens that already passed verification, so a client replaying
+# its bearer token skips the signature check until the token expires. The
+# whole cache is dropped once it reaches DECODED_TOKEN_CACHE_SIZE entries.
+DECODED_TOKEN_CACHE_SIZE = 4096
+_decoded_tokens = {}
 
 
 def decode_token(token):
     """Decode and validate JWT token"""
+    payload = _decoded_tokens.get(token)
+    if payload is not None:
+        if payload['exp'] > time.time():
+            return payload
+        # Another thread may have dropped it since the get()
+        _decoded_tokens.pop(token, None)
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    if 'exp' in payload:
+        if len(_decoded_tokens) >= DECODED_TOKEN_CACHE_SIZE:
+            _decoded_tokens.clear()
+        _decoded_tokens[token] = payload
+    return payload
 
 
 def require_auth(func):
-    """Decorator to require authentication"""
+    """Decorator to require authentication
+    
+    The User and profile rows are cached for AUTH_USER_CACHE_TIMEOUT, but
+    is_active and the role are read again on every request: QuerySet.update()
+    and other worker processes change them without clearing this process's
+    cache. Code that updates users or profiles with .update() should still
+    call cache.delete(auth_user_cache_key(id)) so the rest of the row
+    follows.
+    """
     @wraps(func)
     def wrapper(self, info, *args, **kwargs):
         request = info.context
@@ -49,30 +102,57 @@ def require_auth(func):
         if not payload:
             raise Exception('Invalid or expired token')
         
-        # Add user to context
-        try:
-            user = User.objects.get(id=payload['user_id'])
-            request.user = user
-        except User.DoesNotExist:
-            raise Exception('User not found')
+        # Add user to context, from the cache when this user was seen recently
+        cache_key = auth_user_cache_key(payload['user_id'])
+        user = cache.get(cache_key)
+        if user is None:
+            try:
+                user = User.objects.select_related('profile').get(id=payload['user_id'])
+            except User.DoesNotExist:
+                raise Exception('User not found')
+            cache.set(cache_key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        else:
+            current = User.objects.filter(id=user.id).values_list('is_active', 'profile__role').first()
+            if current is None:
+                cache.delete(cache_key)
+                raise Exception('User not found')
+            user.is_active, user.profile.role = current
+        request.user = user
         
         return func(self, info, *args, **kwargs)
     return wrapper
 
 
+# Roles allowed to edit any post and to approve comments
+EDITOR_ROLES = frozenset({'admin', 'moderator'})
+
+
+def request_role(request):
+    """Role of the request's authenticated user, or None if there isn't one
+    
+    Looked up once per request and user, however many resolvers ask.
+    """
+    if not hasattr(request, 'user') or not request.user.is_authenticated:
+        return None
+    cached = getattr(request, '_user_role', None)
+    if cached is None or cached[0] is not request.user:
+        cached = request._user_role = (request.user, request.user.profile.role)
+    return cached[1]
+
+
 def require_role(*allowed_roles):
     """Decorator to check user role"""
+    allowed = frozenset(allowed_roles)
+    
     def decorator(func):
         @wraps(func)
         def wrapper(self, info, *args, **kwargs):
-            request = info.context
+            user_role = request_role(info.context)
             
-            if not hasattr(request, 'user') or not request.user.is_authenticated:
+            if user_role is None:
                 raise Exception('Authentication required')
             
-            user_role = request.user.profile.role
-            
-            if user_role not in allowed_roles:
+            if user_role not in allowed:
                 raise Exception(f'Permission denied. Required roles: {", ".join(allowed_roles)}')
             
             return func(self, info, *args, **kwargs)
@@ -131,21 +211,27 @@ class PostType(DjangoObjectType):
     def resolve_can_edit(self, info):
         """Check if current user can edit post"""
         request = info.context
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        role = request_role(request)
+        if role is None:
             return False
-        return self.author.id == request.user.id or request.user.profile.role in ['admin', 'moderator']
+        return self.author_id == request.user.id or role in EDITOR_ROLES
     
     def resolve_can_delete(self, info):
         """Check if current user can delete post"""
         request = info.context
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        role = request_role(request)
+        if role is None:
             return False
-        return self.author.id == request.user.id or request.user.profile.role in ['admin']
+        return self.author_id == request.user.id or role == 'admin'
     
     def resolve_comments(self, info):
-        return self.comments.filter(is_approved=True)
+        if hasattr(self, 'approved_comments'):
+            return self.approved_comments
+        return self.comments.filter(is_approved=True).select_related('author')
     
     def resolve_comment_count(self, info):
+        if hasattr(self, 'approved_count'):
+            return self.approved_count
         return self.comments.filter(is_approved=True).count()
 
 
@@ -206,6 +292,20 @@ class CommentInput(graphene.InputObjectType):
     post_id = graphene.Int(required=True)
 
 
+# ==================== Selection Helpers ====================
+
+def selects_field(info, name):
+    """Whether the query asks for `name` under the field being resolved
+    
+    Fragments are assumed to select it, since they aren't expanded here.
+    """
+    for node in info.field_nodes:
+        for selection in node.selection_set.selections:
+            if not isinstance(selection, FieldNode) or selection.name.value == name:
+                return True
+    return False
+
+
 # ==================== Mutations ====================
 
 class Register(graphene.Mutation):
@@ -219,13 +319,17 @@ class Register(graphene.Mutation):
     message = graphene.String()
     
     @staticmethod
+    @transaction.atomic
     def mutate(root, info, input):
         try:
-            # Check if user exists
-            if User.objects.filter(username=input.username).exists():
+            # Check if user exists, username first, in a single query
+            taken = User.objects.filter(
+                Q(username=input.username) | Q(email=input.email)
+            ).values_list('username', flat=True)
+            if input.username in taken:
                 return Register(success=False, message="Username already exists", user=None, token=None)
             
-            if User.objects.filter(email=input.email).exists():
+            if taken:
                 return Register(success=False, message="Email already exists", user=None, token=None)
             
             # Create user
@@ -271,24 +375,20 @@ class Login(graphene.Mutation):
     @staticmethod
     def mutate(root, info, username, password):
         try:
-            # Get user
-            user = User.objects.filter(username=username).first()
-            
-            if not user or not check_password(password, user.password):
-                return Login(
-                    success=False,
-                    message="Invalid username or password",
-                    user=None,
-                    token=None
-                )
-            
-            if not user.is_active:
-                return Login(
-                    success=False,
-                    message="User account is inactive",
-                    user=None,
-                    token=None
-                )
+            # authenticate() still runs the hasher for unknown usernames, so
+            # response time doesn't reveal which accounts exist, and rehashes
+            # passwords stored with an older hasher
+            user = authenticate(info.context, username=username, password=password)
+            
+            if user is None:
+                # ModelBackend turns inactive accounts away too; look for one
+                # only on this failure path to say why
+                inactive = User.objects.filter(username=username, is_active=False).first()
+                if inactive is not None and inactive.check_password(password):
+                    message = "User account is inactive"
+                else:
+                    message = "Invalid username or password"
+                return Login(success=False, message=message, user=None, token=None)
             
             # Generate token
             token = generate_token(user.id)
@@ -321,21 +421,26 @@ class UpdateProfile(graphene.Mutation):
     
     @staticmethod
     @require_auth
+    @transaction.atomic
     def mutate(root, info, input):
         try:
             user = info.context.user
             
             # Update user fields
+            changed = []
             if input.first_name:
                 user.first_name = input.first_name
+                changed.append('first_name')
             if input.last_name:
                 user.last_name = input.last_name
-            user.save()
+                changed.append('last_name')
+            if changed:
+                user.save(update_fields=changed)
             
             # Update profile
             if input.bio:
                 user.profile.bio = input.bio
-                user.profile.save()
+                user.profile.save(update_fields=['bio', 'updated_at'])
             
             # Log activity
             ActivityLog.objects.create(
@@ -363,17 +468,18 @@ class ChangePassword(graphene.Mutation):
     
     @staticmethod
     @require_auth
+    @transaction.atomic
     def mutate(root, info, input):
         try:
             user = info.context.user
             
             # Verify old password
-            if not check_password(input.old_password, user.password):
+            if not user.check_password(input.old_password):
                 return ChangePassword(success=False, message="Old password is incorrect")
             
             # Set new password
             user.set_password(input.new_password)
-            user.save()
+            user.save(update_fields=['password'])
             
             # Log activity
             ActivityLog.objects.create(
@@ -398,6 +504,7 @@ class CreatePost(graphene.Mutation):
     
     @staticmethod
     @require_auth
+    @transaction.atomic
     def mutate(root, info, input):
         try:
             user = info.context.user
@@ -438,13 +545,15 @@ class UpdatePost(graphene.Mutation):
     
     @staticmethod
     @require_auth
+    @transaction.atomic
     def mutate(root, info, id, input):
         try:
             user = info.context.user
-            post = Post.objects.get(id=id)
+            # content is always replaced, so don't read the old one
+            post = Post.objects.defer('content').select_related('author').get(id=id)
             
             # Check permission
-            if post.author.id != user.id and user.profile.role not in ['admin', 'moderator']:
+            if post.author_id != user.id and request_role(info.context) not in EDITOR_ROLES:
                 return UpdatePost(
                     success=False,
                     message="You don't have permission to update this post",
@@ -458,7 +567,7 @@ class UpdatePost(graphene.Mutation):
                 post.status = input.status
             if input.can_comment is not None:
                 post.can_comment = input.can_comment
-            post.save()
+            post.save(update_fields=['title', 'content', 'status', 'can_comment', 'updated_at'])
             
             # Log activity
             ActivityLog.objects.create(
@@ -488,20 +597,25 @@ class DeletePost(graphene.Mutation):
     
     @staticmethod
     @require_auth
+    @transaction.atomic
     def mutate(root, info, id):
         try:
             user = info.context.user
-            post = Post.objects.get(id=id)
             
-            # Check permission
-            if post.author.id != user.id and user.profile.role != 'admin':
+            # Check permission in the DELETE itself: admins may delete any post
+            posts = Post.objects.filter(id=id)
+            if request_role(info.context) != 'admin':
+                posts = posts.filter(author=user)
+            deleted, _ = posts.delete()
+            
+            if not deleted:
+                if not Post.objects.filter(id=id).exists():
+                    return DeletePost(success=False, message="Post not found")
                 return DeletePost(
                     success=False,
                     message="You don't have permission to delete this post"
                 )
             
-            post.delete()
-            
             # Log activity
             ActivityLog.objects.create(
                 user=user,
@@ -510,8 +624,6 @@ class DeletePost(graphene.Mutation):
             )
             
             return DeletePost(success=True, message="Post deleted successfully")
-        except Post.DoesNotExist:
-            return DeletePost(success=False, message="Post not found")
         except Exception as e:
             return DeletePost(success=False, message=str(e))
 
@@ -543,7 +655,7 @@ class CreateComment(graphene.Mutation):
                 text=input.text,
                 author=user,
                 post=post,
-                is_approved=user.profile.role in ['admin', 'moderator']  # Auto-approve for moderators
+                is_approved=request_role(info.context) in EDITOR_ROLES  # Auto-approve for moderators
             )
             
             return CreateComment(
@@ -569,11 +681,17 @@ class ApproveComment(graphene.Mutation):
     @staticmethod
     @require_auth
     @require_role('admin', 'moderator')
+    @transaction.atomic
     def mutate(root, info, id):
         try:
-            comment = Comment.objects.get(id=id)
-            comment.is_approved = True
-            comment.save()
+            approved = Comment.objects.filter(id=id).update(is_approved=True, updated_at=timezone.now())
+            if not approved:
+                return ApproveComment(success=False, message="Comment not found", comment=None)
+            
+            # Only read the row back if the response includes it
+            comment = None
+            if selects_field(info, 'comment'):
+                comment = Comment.objects.select_related('author').get(id=id)
             
             # Log activity
             ActivityLog.objects.create(
@@ -587,8 +705,6 @@ class ApproveComment(graphene.Mutation):
                 message="Comment approved",
                 comment=comment
             )
-        except Comment.DoesNotExist:
-            return ApproveComment(success=False, message="Comment not found", comment=None)
         except Exception as e:
             return ApproveComment(success=False, message=str(e), comment=None)
 
@@ -608,21 +724,52 @@ class Mutation(graphene.ObjectType):
 
 # ==================== Queries ====================
 
+# List queries return at most `limit` rows from `offset`; the limit defaults
+# to LIST_LIMIT and is capped at MAX_LIST_LIMIT whatever the client asks for
+LIST_LIMIT = 50
+ACTIVITY_LIST_LIMIT = 100
+MAX_LIST_LIMIT = 500
+
+
+def list_arguments(limit=LIST_LIMIT):
+    """limit/offset arguments for a paginated list field"""
+    return {
+        'limit': graphene.Int(required=True, default_value=limit),
+        'offset': graphene.Int(required=True, default_value=0),
+    }
+
+
+def paginate(queryset, limit, offset):
+    """Slice a queryset to one page, clamping the client's limit and offset"""
+    limit = min(max(limit, 0), MAX_LIST_LIMIT)
+    offset = max(offset, 0)
+    return queryset[offset:offset + limit]
+
+
+def published_posts_page_order():
+    """Published posts newest first, ties broken by id
+    
+    Posts created in the same instant have no order of their own, so without
+    the id an offset page could repeat or skip them.
+    """
+    return Post.objects.with_relations().filter(status='published').order_by('-created_at', '-id')
+
+
 class Query(graphene.ObjectType):
     """All queries"""
     
     # User queries
     me = graphene.Field(UserType)
     user = graphene.Field(UserType, id=graphene.Int(required=True))
-    all_users = graphene.List(UserType)
+    all_users = graphene.List(UserType, **list_arguments())
     user_by_username = graphene.Field(UserType, username=graphene.String(required=True))
     
     # Post queries
     post = graphene.Field(PostType, id=graphene.Int(required=True))
-    all_posts = graphene.List(PostType)
+    all_posts = graphene.List(PostType, **list_arguments())
     my_posts = graphene.List(PostType)
     user_posts = graphene.List(PostType, user_id=graphene.Int(required=True))
-    published_posts = graphene.List(PostType)
+    published_posts = graphene.List(PostType, **list_arguments())
     
     # Comment queries
     post_comments = graphene.List(CommentType, post_id=graphene.Int(required=True))
@@ -631,7 +778,7 @@ class Query(graphene.ObjectType):
     # Activity queries
     my_activity = graphene.List(ActivityLogType)
     user_activity = graphene.List(ActivityLogType, user_id=graphene.Int(required=True))
-    all_activity = graphene.List(ActivityLogType)
+    all_activity = graphene.List(ActivityLogType, **list_arguments(ACTIVITY_LIST_LIMIT))
     
     def resolve_me(self, info):
         """Get current authenticated user"""
@@ -647,9 +794,9 @@ class Query(graphene.ObjectType):
         except User.DoesNotExist:
             return None
     
-    def resolve_all_users(self, info):
+    def resolve_all_users(self, info, limit, offset):
         """Get all users"""
-        return User.objects.filter(is_active=True)
+        return paginate(User.objects.filter(is_active=True).order_by('id'), limit, offset)
     
     def resolve_user_by_username(self, info, username):
         """Get user by username"""
@@ -661,47 +808,43 @@ class Query(graphene.ObjectType):
     def resolve_post(self, info, id):
         """Get post by ID"""
         try:
-            return Post.objects.get(id=id)
+            return Post.objects.with_relations().get(id=id)
         except Post.DoesNotExist:
             return None
     
-    def resolve_all_posts(self, info):
+    def resolve_all_posts(self, info, limit, offset):
         """Get all published posts"""
-        return Post.objects.filter(status='published')
+        return paginate(published_posts_page_order(), limit, offset)
     
     def resolve_my_posts(self, info):
         """Get current user's posts (requires auth)"""
         request = info.context
         if not hasattr(request, 'user') or not request.user.is_authenticated:
             return Post.objects.none()
-        return Post.objects.filter(author=request.user)
+        return Post.objects.with_relations().filter(author=request.user)
     
     def resolve_user_posts(self, info, user_id):
         """Get posts by specific user"""
-        return Post.objects.filter(author_id=user_id, status='published')
+        return Post.objects.with_relations().filter(author_id=user_id, status='published')
     
-    def resolve_published_posts(self, info):
+    def resolve_published_posts(self, info, limit, offset):
         """Get all published posts (paginated)"""
-        return Post.objects.filter(status='published')
+        return paginate(published_posts_page_order(), limit, offset)
     
     def resolve_post_comments(self, info, post_id):
         """Get comments for a post"""
         try:
             post = Post.objects.get(id=post_id)
-            return post.comments.filter(is_approved=True)
+            return post.comments.filter(is_approved=True).select_related('author')
         except Post.DoesNotExist:
             return Comment.objects.none()
     
     def resolve_pending_comments(self, info):
         """Get pending comments (admin/moderator only)"""
-        request = info.context
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if request_role(info.context) not in EDITOR_ROLES:
             return Comment.objects.none()
         
-        if request.user.profile.role not in ['admin', 'moderator']:
-            return Comment.objects.none()
-        
-        return Comment.objects.filter(is_approved=False)
+        return Comment.objects.filter(is_approved=False).select_related('author')
     
     def resolve_my_activity(self, info):
         """Get current user's activity (requires auth)"""
@@ -712,25 +855,17 @@ class Query(graphene.ObjectType):
     
     def resolve_user_activity(self, info, user_id):
         """Get user activity (admin only)"""
-        request = info.context
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
-            return ActivityLog.objects.none()
-        
-        if request.user.profile.role != 'admin':
+        if request_role(info.context) != 'admin':
             return ActivityLog.objects.none()
         
         return ActivityLog.objects.filter(user_id=user_id)[:20]
     
-    def resolve_all_activity(self, info):
+    def resolve_all_activity(self, info, limit, offset):
         """Get all activity (admin only)"""
-        request = info.context
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
-            return ActivityLog.objects.none()
-        
-        if request.user.profile.role != 'admin':
+        if request_role(info.context) != 'admin':
             return ActivityLog.objects.none()
         
-        return ActivityLog.objects.all()[:100]
+        return paginate(ActivityLog.objects.all(), limit, offset)
 
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
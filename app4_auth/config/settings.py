@@ -42,9 +42,19 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Tests migrate a shared-cache in-memory database; each pytest-xdist
+        # worker is its own process and so gets its own
+        'TEST': {'NAME': ':memory:'},
     }
 }
 
+# New passwords are hashed with the first hasher; PBKDF2 stays so existing
+# hashes still verify and are upgraded on the next login
+PASSWORD_HASHERS = [
+    'auth_app.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -59,7 +69,19 @@ USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache (use Redis, e.g. django-redis, when running several processes)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'app4-auth',
+    }
+}
+
 # JWT Settings
 JWT_SECRET = 'app4-jwt-secret-keep-this-safe'
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
+
+# Seconds an authenticated user (with profile) stays cached between requests;
+# require_auth still re-reads is_active and the role every time
+AUTH_USER_CACHE_TIMEOUT = 300
@@ -9,22 +9,70 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
+
+# Users shared by the whole session: username -> (email, role)
+TEST_USERS = {
+    'normaluser': ('user@example.com', 'user'),
+    'moderator': ('mod@example.com', 'moderator'),
+    'admin': ('admin@example.com', 'admin'),
+}
+TEST_PASSWORD = 'password123'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fast_password_hasher():
+    """Hash passwords with MD5 for the session
+    
+    Password hashing strength doesn't matter in tests, only its cost does.
+    """
+    with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+        yield
+
 
 @pytest.fixture(scope='session')
-def django_db_setup():
-    """Ensure database is setup for tests"""
-    pass
+def django_db_setup(django_db_setup, django_db_blocker, fast_password_hasher):
+    """Create the shared test users once, in a transaction rolled back at the end
+    
+    pytest-django's own django_db_setup builds the test database by running
+    the migrations (in memory, see DATABASES['default']['TEST']). Every test
+    is marked django_db, so pytest-django runs it in a savepoint inside this
+    transaction and rolls it back afterwards; no per-test table reset or
+    user setup is needed.
+    """
+    with django_db_blocker.unblock():
+        session_atomic = transaction.atomic()
+        session_atomic.__enter__()
+    try:
+        with django_db_blocker.unblock():
+            for username, (email, role) in TEST_USERS.items():
+                user, _ = User.objects.get_or_create(username=username, defaults={'email': email})
+                user.set_password(TEST_PASSWORD)
+                user.save(update_fields=['password'])
+                if user.profile.role != role:
+                    user.profile.role = role
+                    user.profile.save(update_fields=['role'])
+        yield
+    finally:
+        # Roll back even when creating the users failed
+        with django_db_blocker.unblock():
+            transaction.set_rollback(True)
+            session_atomic.__exit__(None, None, None)
 
 
-@pytest.fixture(scope='function')
-def django_db_reset(django_db_setup, django_db_blocker):
-    """Reset database for each test function"""
+@pytest.fixture(scope='session')
+def test_user_ids(django_db_setup, django_db_blocker):
+    """Ids of the TEST_USERS by username, fixed for the whole session"""
     with django_db_blocker.unblock():
-        from auth_app.models import ActivityLog, Comment, Post, UserProfile
-        from django.contrib.auth.models import User
-        
-        ActivityLog.objects.all().delete()
-        Comment.objects.all().delete()
-        Post.objects.all().delete()
-        UserProfile.objects.all().delete()
-        User.objects.all().delete()
+        return dict(User.objects.filter(username__in=TEST_USERS).values_list('username', 'id'))
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Clear cache before each test; user ids are reused once a test rolls back"""
+    cache.clear()
+    yield
+    cache.clear()
@@ -3,7 +3,7 @@ from graphene_django import DjangoObjectType
 from graphene.types.schema import Schema
 from promise import Promise
 from django.db import models
-from django.db.models import Avg, Count, Q, Max, Min, Sum
+from django.db.models import Avg, Count, Q, Max, Min, Sum, Prefetch
 from django.core.cache import cache
 from perf_app.models import Organization, Employee, Project, Performance, TestResult
 
@@ -148,6 +148,19 @@ class EmployeeStatsType(graphene.ObjectType):
     average_salary = graphene.Float()
 
 
+# ==================== Querysets ====================
+
+def projects_with_relations():
+    """Projects with their organization and team members loaded up front
+    
+    Team members come with their own organization too, so organizationName on
+    a nested teamMembers list doesn't cost a query per employee.
+    """
+    return Project.objects.select_related('organization').prefetch_related(
+        Prefetch('team_members', queryset=Employee.objects.select_related('organization'))
+    )
+
+
 # ==================== Queries ====================
 
 class Query(graphene.ObjectType):
@@ -241,23 +254,21 @@ class Query(graphene.ObjectType):
     def resolve_project(self, info, id):
         """Get project by ID - with prefetch_related for M2M"""
         try:
-            return Project.objects.prefetch_related('team_members').select_related('organization').get(id=id)
+            return projects_with_relations().get(id=id)
         except Project.DoesNotExist:
             return None
     
     def resolve_all_projects(self, info):
         """Get all projects - with optimization"""
-        return Project.objects.prefetch_related('team_members').select_related('organization')
+        return projects_with_relations()
     
     def resolve_projects_by_status(self, info, status):
         """Get projects by status"""
-        return Project.objects.filter(status=status).prefetch_related('team_members').select_related('organization')
+        return projects_with_relations().filter(status=status)
     
     def resolve_projects_by_organization(self, info, organization_id):
         """Get projects for organization"""
-        return Project.objects.filter(
-            organization_id=organization_id
-        ).prefetch_related('team_members').select_related('organization')
+        return projects_with_relations().filter(organization_id=organization_id)
     
     def resolve_performance_metrics(self, info, metric_type=None):
         """Get performance metrics"""
@@ -373,6 +373,31 @@ class TestNPlusOnePrevention:
         '''
         # Should use prefetch_related for M2M relationship
     
+    def test_project_team_members_organization_prefetched(self, api_client, sample_projects, django_assert_num_queries):
+        """Test nested team member organizations don't cost a query per employee"""
+        query = '''
+            query {
+                allProjects {
+                    organizationName
+                    teamSize
+                    teamMembers {
+                        name
+                        organizationName
+                    }
+                }
+            }
+        '''
+        # Projects with their organization, then team members with theirs
+        with django_assert_num_queries(2):
+            result = api_client.execute(query)
+        assert 'errors' not in result
+        # Every team in the fixtures is staffed from the project's own organization
+        assert all(
+            member['organizationName'] == project['organizationName']
+            for project in result['data']['allProjects']
+            for member in project['teamMembers']
+        )
+    
     def test_organization_with_employees_optimized(self, api_client, sample_organizations, sample_employees):
         """Test organization with employees query optimization"""
         org_id = sample_organizations[0].id